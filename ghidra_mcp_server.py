@@ -15,15 +15,256 @@ import asyncio
 import json
 import sys
 import os
-import subprocess
-from typing import Any, Sequence
+import mmap
+import signal
+from stat import S_ISREG
+import struct
+import time
+import functools
+import contextlib
+import inspect
+from typing import Any, Awaitable, Callable, Optional, Sequence, Union
 from pathlib import Path
 
+# Optional: lets extract_strings scan files in-process
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # For MCP protocol
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 import mcp.server.stdio
 
+# The tools we offer. They never change, so build them once at import
+# time instead of on every tools/list request.
+_TOOLS = (
+    Tool(
+        name="analyze_binary",
+        description="Analyze a binary file and get basic information (file type, size, architecture)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the binary file to analyze"
+                }
+            },
+            "required": ["file_path"]
+        }
+    ),
+    Tool(
+        name="extract_strings",
+        description="Extract readable strings from a binary file",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the binary file"
+                },
+                "min_length": {
+                    "type": "integer",
+                    "description": "Minimum string length (default: 4)",
+                    "default": 4
+                }
+            },
+            "required": ["file_path"]
+        }
+    ),
+    Tool(
+        name="get_file_info",
+        description="Get detailed file information using 'file' command",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file"
+                }
+            },
+            "required": ["file_path"]
+        }
+    ),
+    Tool(
+        name="check_security",
+        description="Check binary security features (NX, PIE, Stack Canary, RELRO)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the binary file"
+                }
+            },
+            "required": ["file_path"]
+        }
+    )
+)
+
+# Leading bytes of the executable formats we recognise
+_MAGIC_FORMATS = (
+    (b"\x7fELF", "ELF"),
+    (b"MZ", "PE"),
+    (b"\xcf\xfa\xed\xfe", "Mach-O"),  # 64-bit, little endian
+    (b"\xce\xfa\xed\xfe", "Mach-O"),  # 32-bit, little endian
+    (b"\xfe\xed\xfa\xcf", "Mach-O"),  # 64-bit, big endian
+    (b"\xfe\xed\xfa\xce", "Mach-O"),  # 32-bit, big endian
+    (b"\xca\xfe\xba\xbe", "Mach-O (universal)"),
+)
+
+def _elf_structs(formats: dict) -> dict:
+    """
+    Compile {ei_class: format} into {(ei_class, ei_data): struct.Struct}
+    
+    LEARNING NOTE: A Struct parses its format string once, up front.
+    struct.unpack_from(fmt, ...) would re-parse it on every call.
+    """
+    return {
+        (ei_class, ei_data): struct.Struct(("<" if ei_data == 1 else ">") + fmt)
+        for ei_class, fmt in formats.items()
+        for ei_data in (1, 2)  # little endian, big endian
+    }
+
+# The ELF header: 16-byte e_ident, then fields sized by ELF class
+_ELF_HEADERS = _elf_structs({
+    1: "16sHHIIIIIHHHHHH",  # ELFCLASS32
+    2: "16sHHIQQQIHHHHHH",  # ELFCLASS64
+})
+_ELF_HEADER_FIELDS = (
+    "ident", "e_type", "e_machine", "e_version", "e_entry", "e_phoff", "e_shoff",
+    "e_flags", "e_ehsize", "e_phentsize", "e_phnum", "e_shentsize",
+    "e_shnum", "e_shstrndx",
+)
+
+# Names as printed by 'readelf -h'
+_ELF_TYPES = {
+    0: "NONE (None)",
+    1: "REL (Relocatable file)",
+    2: "EXEC (Executable file)",
+    3: "DYN (Shared object file)",
+    4: "CORE (Core file)",
+}
+_ELF_MACHINES = {
+    0x03: "Intel 80386",
+    0x08: "MIPS R3000",
+    0x14: "PowerPC",
+    0x15: "PowerPC64",
+    0x28: "ARM",
+    0x3E: "Advanced Micro Devices X86-64",
+    0xB7: "AArch64",
+    0xF3: "RISC-V",
+}
+_ELF_OSABIS = {
+    0: "UNIX - System V",
+    3: "UNIX - GNU",
+    9: "UNIX - FreeBSD",
+    12: "UNIX - OpenBSD",
+}
+
+# Program header, section header and dynamic entry layouts per ELF class.
+# Note p_flags moves from the 7th field (32-bit) to the 2nd (64-bit).
+_ELF_PHDRS = _elf_structs({1: "IIIIIIII", 2: "IIQQQQQQ"})
+_ELF_SHDRS = _elf_structs({1: "IIIIIIIIII", 2: "IIQQQQIIQQ"})
+_ELF_DYNS = _elf_structs({1: "iI", 2: "qQ"})
+
+PT_DYNAMIC = 2
+PT_GNU_STACK = 0x6474E551
+PF_X = 0x1
+SHT_SYMTAB = 2
+SHT_DYNSYM = 11
+DT_NULL = 0
+DT_FLAGS_1 = 0x6FFFFFFB
+DF_1_PIE = 0x08000000
+
+# Tool results are reused for this long, as long as the file is unchanged
+_CACHE_TTL = 300  # seconds
+_CACHE_MAX_ENTRIES = 256
+
+# A read-only view of a whole file, see GhidraMCPServer._open_mapped
+MappedFile = Union[mmap.mmap, bytes]
+
+def _decode(output: bytes) -> str:
+    """Turn command output into text without choking on odd bytes"""
+    return output.decode("utf-8", errors="replace")
+
+async def _read_lines(stream: asyncio.StreamReader):
+    """
+    Yield lines from a command's output, like `async for line in stream`
+    
+    A line longer than the stream's buffer limit makes readline() raise
+    ValueError; here it is cut at the limit and the rest skipped instead.
+    """
+    while True:
+        try:
+            line = await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                yield e.partial  # last line had no newline
+            return
+        except asyncio.LimitOverrunError as e:
+            line = await stream.readexactly(e.consumed) + b"\n"
+            while True:
+                try:
+                    await stream.readuntil(b"\n")
+                    break
+                except asyncio.LimitOverrunError as rest:
+                    await stream.readexactly(rest.consumed)
+                except asyncio.IncompleteReadError:
+                    break
+        yield line
+
+def _cached(method):
+    """
+    Cache a tool's result keyed on (tool, path, file identity, args)
+    
+    LEARNING NOTE: Claude often asks about the same binary several times
+    in one session. If the file hasn't changed, the answer hasn't either,
+    so we skip re-running file/readelf/nm entirely.
+    
+    The path is kept exactly as given, since tools echo it back and
+    'file' describes symlinks rather than following them. Inode, mode
+    and ctime catch a chmod or a same-size replacement that mtime and
+    size alone would miss.
+    """
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    async def wrapper(self, file_path: str, *args, **kwargs) -> str:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            # Let the tool itself report the missing file
+            return await method(self, file_path, *args, **kwargs)
+        
+        # Normalise the arguments so extract_strings(p), (p, 4) and
+        # (p, min_length=4) all share one entry
+        bound = signature.bind(self, file_path, *args, **kwargs)
+        bound.apply_defaults()
+        options = tuple(bound.arguments.items())[2:]  # skip self, file_path
+        
+        key = (
+            method.__name__, file_path,
+            stat.st_dev, stat.st_ino, stat.st_mode,
+            stat.st_mtime_ns, stat.st_ctime_ns, stat.st_size,
+            *options
+        )
+        hit = self._cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < _CACHE_TTL:
+            return hit[1]
+        
+        result = await method(*bound.args, **bound.kwargs)
+        
+        # Re-insert so dict order stays oldest-first, then trim
+        self._cache.pop(key, None)
+        self._cache[key] = (time.monotonic(), result)
+        if len(self._cache) > _CACHE_MAX_ENTRIES:
+            self._cache.pop(next(iter(self._cache)))
+        return result
+    
+    return wrapper
+
 class GhidraMCPServer:
     """
     Simple Ghidra MCP Server
@@ -37,13 +278,53 @@ class GhidraMCPServer:
     
     def __init__(self):
         self.server = Server("ghidra-mcp")
-        self.ghidra_path = self._find_ghidra()
-        self.workspace = Path.home() / ".ghidra_mcp_workspace"
-        self.workspace.mkdir(exist_ok=True)
+        self._cache: dict[tuple, tuple[float, str]] = {}
+        
+        # Keep external commands to one per spare core, so a burst of
+        # tool calls doesn't fork hundreds of processes at once
+        try:
+            cpus = len(os.sched_getaffinity(0))
+        except AttributeError:  # not available on macOS
+            cpus = os.cpu_count() or 1
+        self._subprocess_slots = asyncio.Semaphore(max(1, cpus - 1))
+        
+        # Files smaller than this are scanned for strings in-process. The
+        # NumPy scan needs a few bytes of scratch memory per file byte, so
+        # bigger files go to 'strings', which we can stop after 100 hits.
+        self._strings_inproc_threshold = 16 << 20  # 16 MiB
+        
+        # One 'file' process serves every file type lookup (see _file_type)
+        self._file_proc = None
+        self._file_lock = asyncio.Lock()
+        
+        # Tool name -> handler, so call_tool is a single dict lookup
+        self._dispatch: dict[str, Callable[[dict], Awaitable[str]]] = {
+            "analyze_binary": lambda args: self.analyze_binary(args["file_path"]),
+            "extract_strings": lambda args: self.extract_strings(args["file_path"], args.get("min_length", 4)),
+            "get_file_info": lambda args: self.get_file_info(args["file_path"]),
+            "check_security": lambda args: self.check_security(args["file_path"]),
+        }
         
         # Register our tools and handlers
         self._register_handlers()
     
+    @functools.cached_property
+    def ghidra_path(self) -> Optional[str]:
+        """
+        Ghidra install directory, or None if not found
+        
+        LEARNING NOTE: None of the current tools need Ghidra, so we only
+        go looking for it the first time something asks, then remember.
+        """
+        return self._find_ghidra()
+    
+    @functools.cached_property
+    def workspace(self) -> Path:
+        """Working directory for analysis output, created on first use"""
+        workspace = Path.home() / ".ghidra_mcp_workspace"
+        workspace.mkdir(exist_ok=True)
+        return workspace
+    
     def _find_ghidra(self) -> str:
         """Find Ghidra installation path"""
         # Common Ghidra paths
@@ -71,69 +352,7 @@ class GhidraMCPServer:
             This function tells Claude what tools are available.
             Each tool needs: name, description, and input schema
             """
-            return [
-                Tool(
-                    name="analyze_binary",
-                    description="Analyze a binary file and get basic information (file type, size, architecture)",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the binary file to analyze"
-                            }
-                        },
-                        "required": ["file_path"]
-                    }
-                ),
-                Tool(
-                    name="extract_strings",
-                    description="Extract readable strings from a binary file",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the binary file"
-                            },
-                            "min_length": {
-                                "type": "integer",
-                                "description": "Minimum string length (default: 4)",
-                                "default": 4
-                            }
-                        },
-                        "required": ["file_path"]
-                    }
-                ),
-                Tool(
-                    name="get_file_info",
-                    description="Get detailed file information using 'file' command",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the file"
-                            }
-                        },
-                        "required": ["file_path"]
-                    }
-                ),
-                Tool(
-                    name="check_security",
-                    description="Check binary security features (NX, PIE, Stack Canary, RELRO)",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the binary file"
-                            }
-                        },
-                        "required": ["file_path"]
-                    }
-                )
-            ]
+            return list(_TOOLS)
         
         # Handle tool calls
         @self.server.call_tool()
@@ -143,17 +362,13 @@ class GhidraMCPServer:
             It routes to the correct handler based on the tool name.
             """
             try:
-                if name == "analyze_binary":
-                    result = await self.analyze_binary(arguments["file_path"])
-                elif name == "extract_strings":
-                    min_len = arguments.get("min_length", 4)
-                    result = await self.extract_strings(arguments["file_path"], min_len)
-                elif name == "get_file_info":
-                    result = await self.get_file_info(arguments["file_path"])
-                elif name == "check_security":
-                    result = await self.check_security(arguments["file_path"])
-                else:
+                # .get() rather than catching KeyError, so a missing
+                # argument isn't mistaken for an unknown tool
+                handler = self._dispatch.get(name)
+                if handler is None:
                     result = f"Unknown tool: {name}"
+                else:
+                    result = await handler(arguments)
                 
                 return [TextContent(type="text", text=result)]
             
@@ -161,8 +376,367 @@ class GhidraMCPServer:
                 error_msg = f"Error executing {name}: {str(e)}"
                 return [TextContent(type="text", text=error_msg)]
     
+    async def _run(self, cmd: list[str]) -> tuple[int, bytes]:
+        """
+        Run a command and return (exit code, combined output as bytes)
+        
+        LEARNING NOTE: subprocess.check_output() blocks the whole event
+        loop, so one slow command freezes every other tool call. The
+        asyncio version lets the server keep answering while we wait.
+        
+        A missing command is reported like the shell does: exit code 127.
+        Output stays as bytes: symbol names and strings aren't always
+        valid UTF-8, and substring checks work fine on bytes. Decode only
+        what you show to the user (see _decode).
+        """
+        async with self._subprocess_slots:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT
+                )
+            except FileNotFoundError:
+                return 127, f"{cmd[0]}: command not found".encode()
+            out, _ = await proc.communicate()
+            return proc.returncode, out
+    
+    async def _file_type(self, path: Path) -> tuple[int, bytes]:
+        """
+        Describe a file like 'file -b', reusing one long-lived process
+        
+        LEARNING NOTE: 'file -f -' reads file names from stdin, one per
+        line, and -n makes it answer each one straight away instead of
+        buffering. So we start it once and just write a name and read a
+        line back for every lookup - no fork/exec per call.
+        Returns (exit code, output) like _run().
+        """
+        name = os.fsencode(path)
+        if b"\n" in name:
+            # Would break the one-name-per-line protocol
+            return await self._run(["file", "-b", str(path)])
+        
+        async with self._file_lock:
+            if self._file_proc is None or self._file_proc.returncode is not None:
+                try:
+                    self._file_proc = await asyncio.create_subprocess_exec(
+                        "file", "-n", "-b", "-f", "-",
+                        stdin=asyncio.subprocess.PIPE,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+                except FileNotFoundError:
+                    return 127, b"file: command not found"
+            
+            proc = self._file_proc
+            try:
+                proc.stdin.write(name + b"\n")
+                await proc.stdin.drain()
+                line = await proc.stdout.readline()
+            except (BrokenPipeError, ConnectionResetError):
+                line = b""
+            except BaseException:
+                # Interrupted mid-exchange (e.g. the request was cancelled):
+                # the reply may still be sitting in the pipe, and reading it
+                # later would answer the wrong lookup. Drop this process.
+                self._file_proc = None
+                if proc.returncode is None:
+                    # os.kill rather than proc.kill(), as in _stream()
+                    try:
+                        os.kill(proc.pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass  # already gone
+                raise
+            
+            if not line:
+                # The process went away; start a fresh one next time
+                self._file_proc = None
+        
+        if not line:
+            # Outside the lock, so other lookups needn't wait on this one
+            return await self._run(["file", "-b", str(path)])
+        return 0, line.rstrip(b"\n")
+    
+    async def _close_file_proc(self):
+        """Shut down the long-lived 'file' process, if we started one"""
+        if self._file_proc is not None and self._file_proc.returncode is None:
+            self._file_proc.stdin.close()
+            await self._file_proc.wait()
+        self._file_proc = None
+    
+    @contextlib.asynccontextmanager
+    async def _stream(self, cmd: list[str]):
+        """
+        Start a command and hand back the process to read its output
+        
+        LEARNING NOTE: Unlike _run(), this lets you read output line by
+        line (with _read_lines()) and stop early. If you leave the block before the output
+        ends, the command is killed so it doesn't keep working for nothing.
+        Raises FileNotFoundError if the command isn't installed.
+        """
+        async with self._subprocess_slots:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=1 << 20  # longest line _read_lines() keeps whole
+            )
+            try:
+                yield proc
+            finally:
+                if not proc.stdout.at_eof() and proc.returncode is None:
+                    # os.kill rather than proc.kill(): the latter polls the
+                    # child first, and if it has just exited that reaps it
+                    # behind asyncio's back ("Unknown child process" warning)
+                    try:
+                        os.kill(proc.pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass  # already gone
+                await proc.wait()
+    
+    async def _find_line(self, cmd: list[str], needle: bytes) -> tuple[int, Optional[bytes]]:
+        """
+        Return (exit code, first output line containing needle)
+        
+        The command is stopped as soon as the line shows up, in which case
+        the exit code is reported as 0. The line is None if never found.
+        """
+        try:
+            async with self._stream(cmd) as proc:
+                async for line in _read_lines(proc.stdout):
+                    if needle in line:
+                        return 0, line
+        except FileNotFoundError:
+            return 127, None
+        return proc.returncode, None
+    
+    @contextlib.contextmanager
+    def _open_mapped(self, path: Path):
+        """
+        Memory-map a file read-only for the parsers below
+        
+        LEARNING NOTE: Open the file once per tool call and let every
+        parser (magic bytes, ELF header, security checks, strings) read
+        from the same mapping. The OS pages data in as it's touched, and
+        struct/NumPy read it in place without copying.
+        
+        Only regular files are mapped. The file is opened non-blocking so
+        a FIFO swapped in after the caller's check can't stall the server;
+        anything else raises OSError.
+        """
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_NONBLOCK", 0))
+        try:
+            stat = os.fstat(fd)
+            if not S_ISREG(stat.st_mode):
+                raise OSError(f"Not a regular file: {path}")
+            if stat.st_size == 0:
+                yield b""  # mmap can't map an empty file
+                return
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as data:
+                yield data
+        finally:
+            os.close(fd)
+    
+    def _detect_format(self, data: MappedFile) -> Optional[str]:
+        """
+        Identify the executable format from its magic bytes
+        
+        LEARNING NOTE: Every format starts with a fixed signature, so
+        reading 4 bytes is enough - no need to run 'file' for this.
+        """
+        head = data[:4]
+        for magic, name in _MAGIC_FORMATS:
+            if head.startswith(magic):
+                return name
+        return None
+    
+    def _is_elf(self, data: MappedFile) -> bool:
+        """Check for the ELF magic bytes"""
+        return self._detect_format(data) == "ELF"
+    
+    def clear_cache(self):
+        """Forget all cached tool results"""
+        self._cache.clear()
+    
+    def _parse_elf_header(self, data: MappedFile) -> Optional[dict]:
+        """
+        Decode the ELF header directly from the first 64 bytes
+        
+        LEARNING NOTE: The ELF header has a fixed layout, so struct can
+        unpack it in microseconds - much cheaper than starting readelf.
+        Returns None if this isn't a well-formed ELF header.
+        """
+        if len(data) < 16 or data[:4] != b"\x7fELF":
+            return None
+        ei_class, ei_data = data[4], data[5]
+        layout = _ELF_HEADERS.get((ei_class, ei_data))
+        if layout is None or len(data) < layout.size:
+            return None
+        
+        header = dict(zip(_ELF_HEADER_FIELDS, layout.unpack_from(data)))
+        header.update(ei_class=ei_class, ei_data=ei_data)
+        return header
+    
+    def _format_elf_header(self, header: dict, pie_executable: bool = False) -> Optional[str]:
+        """
+        Lay out a parsed ELF header the same way 'readelf -h' does
+        
+        Returns None for anything outside our lookup tables, so the
+        caller can fall back to readelf itself.
+        """
+        if header["e_type"] not in _ELF_TYPES or header["e_machine"] not in _ELF_MACHINES:
+            return None  # exotic file, leave it to readelf
+        if header["e_flags"]:
+            return None  # flag meanings are per-architecture, readelf decodes them
+        
+        ident = header["ident"]
+        osabi = ident[7]
+        elf_type = _ELF_TYPES[header["e_type"]]
+        if pie_executable:
+            elf_type = "DYN (Position-Independent Executable file)"
+        
+        fields = [
+            ("Class:", f"ELF{32 if header['ei_class'] == 1 else 64}"),
+            ("Data:", f"2's complement, {'little' if header['ei_data'] == 1 else 'big'} endian"),
+            ("Version:", "1 (current)" if ident[6] == 1 else str(ident[6])),
+            ("OS/ABI:", _ELF_OSABIS.get(osabi, f"<unknown: {osabi:x}>")),
+            ("ABI Version:", str(ident[8])),
+            ("Type:", elf_type),
+            ("Machine:", _ELF_MACHINES[header["e_machine"]]),
+            ("Version:", f"0x{header['e_version']:x}"),
+            ("Entry point address:", f"0x{header['e_entry']:x}"),
+            ("Start of program headers:", f"{header['e_phoff']} (bytes into file)"),
+            ("Start of section headers:", f"{header['e_shoff']} (bytes into file)"),
+            ("Flags:", f"0x{header['e_flags']:x}"),
+            ("Size of this header:", f"{header['e_ehsize']} (bytes)"),
+            ("Size of program headers:", f"{header['e_phentsize']} (bytes)"),
+            ("Number of program headers:", str(header["e_phnum"])),
+            ("Size of section headers:", f"{header['e_shentsize']} (bytes)"),
+            ("Number of section headers:", str(header["e_shnum"])),
+            ("Section header string table index:", str(header["e_shstrndx"])),
+        ]
+        
+        lines = ["ELF Header:", "  Magic:   " + " ".join(f"{b:02x}" for b in ident) + " "]
+        lines += [f"  {label:<35}{value}" for label, value in fields]
+        return "\n".join(lines) + "\n"
+    
+    def _elf_program_info(self, data: MappedFile, header: dict) -> tuple[Optional[int], int]:
+        """
+        Walk the program headers
+        
+        Returns the PT_GNU_STACK flags (None if there is no such header)
+        and the DT_FLAGS_1 value from the dynamic section (0 if absent).
+        Raises struct.error if the headers run past the end of the file.
+        """
+        layout = (header["ei_class"], header["ei_data"])
+        is_64 = header["ei_class"] == 2
+        phdr = _ELF_PHDRS[layout]
+        dyn = _ELF_DYNS[layout]
+        
+        stack_flags = None
+        flags_1 = 0
+        for i in range(header["e_phnum"]):
+            fields = phdr.unpack_from(data, header["e_phoff"] + i * header["e_phentsize"])
+            if is_64:
+                p_type, p_flags, p_offset, _, _, p_filesz = fields[:6]
+            else:
+                p_type, p_offset, _, _, p_filesz, _, p_flags = fields[:7]
+            
+            if p_type == PT_GNU_STACK:
+                stack_flags = p_flags
+            elif p_type == PT_DYNAMIC:
+                for offset in range(p_offset, p_offset + p_filesz, dyn.size):
+                    d_tag, d_val = dyn.unpack_from(data, offset)
+                    if d_tag == DT_NULL:
+                        break
+                    if d_tag == DT_FLAGS_1:
+                        flags_1 = d_val
+        
+        return stack_flags, flags_1
+    
+    def _elf_symbol_names_contain(self, data: MappedFile, header: dict, needle: bytes) -> bool:
+        """
+        Search the string tables behind .symtab and .dynsym for `needle`
+        
+        LEARNING NOTE: Symbol names live in a string table that the symbol
+        section links to, so a plain byte search there is enough to tell
+        whether a symbol exists - no need to decode every symbol like nm.
+        """
+        shdr = _ELF_SHDRS[(header["ei_class"], header["ei_data"])]
+        
+        def section(index):
+            return shdr.unpack_from(data, header["e_shoff"] + index * header["e_shentsize"])
+        
+        for i in range(header["e_shnum"]):
+            sh_type, sh_link = section(i)[1], section(i)[6]
+            if sh_type in (SHT_SYMTAB, SHT_DYNSYM) and sh_link < header["e_shnum"]:
+                strtab = section(sh_link)
+                sh_offset, sh_size = strtab[4], strtab[5]
+                if data.find(needle, sh_offset, sh_offset + sh_size) != -1:
+                    return True
+        return False
+    
+    def _elf_header_summary(self, data: MappedFile) -> Optional[str]:
+        """readelf -h style header text, or None if readelf is needed"""
+        header = self._parse_elf_header(data)
+        if header is None:
+            return None
+        
+        # readelf calls an ET_DYN file a PIE executable if DF_1_PIE is set
+        pie_executable = False
+        if header["e_type"] == 3:
+            try:
+                _, flags_1 = self._elf_program_info(data, header)
+            except struct.error:
+                return None
+            pie_executable = bool(flags_1 & DF_1_PIE)
+        
+        return self._format_elf_header(header, pie_executable)
+    
+    def _elf_security_features(self, data: MappedFile) -> Optional[dict]:
+        """
+        Work out NX, PIE and stack canary straight from the ELF file
+        
+        - NX: the PT_GNU_STACK header exists and is not executable
+        - PIE: the file type is ET_DYN (position independent)
+        - Canary: a __stack_chk_fail symbol is referenced
+        
+        Returns None if the file isn't an ELF we can parse.
+        """
+        header = self._parse_elf_header(data)
+        if header is None:
+            return None
+        
+        try:
+            stack_flags, _ = self._elf_program_info(data, header)
+            canary = self._elf_symbol_names_contain(data, header, b"__stack_chk_fail")
+        except struct.error:
+            return None  # truncated or corrupt headers
+        
+        return {
+            "nx": stack_flags is not None and not stack_flags & PF_X,
+            "pie": header["e_type"] == 3,  # ET_DYN
+            "canary": canary,
+        }
+    
+    def _read_security_features(self, path: Path) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Open a file and run the checks above, for use in a worker thread
+        
+        The mapping is opened and closed in the same thread that reads it,
+        so a cancelled tool call never tries to close it while it's in use.
+        Returns (detected format, features); features is None unless the
+        file is an ELF we could parse.
+        """
+        with self._open_mapped(path) as data:
+            binary_format = self._detect_format(data)
+            if binary_format != "ELF":
+                return binary_format, None
+            return binary_format, self._elf_security_features(data)
+    
     # ============ TOOL IMPLEMENTATIONS ============
     
+    @_cached
     async def analyze_binary(self, file_path: str) -> str:
         """
         Analyze a binary file and return basic information
@@ -181,38 +755,83 @@ class GhidraMCPServer:
         # Basic file info
         stat = path.stat()
         results.append(f"File Size: {stat.st_size:,} bytes ({stat.st_size / 1024:.2f} KB)")
-        results.append(f"Permissions: {oct(stat.st_mode)[-3:]}")
+        results.append(f"Permissions: {stat.st_mode & 0o777:03o}")
         
-        # File type
-        try:
-            file_output = subprocess.check_output(
-                ["file", str(path)],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            results.append(f"\nFile Type:\n{file_output.strip()}")
-        except subprocess.CalledProcessError as e:
-            results.append(f"Could not determine file type: {e}")
+        # File type, plus the ELF header for ELF binaries. Common headers
+        # are decoded in-process; anything unusual still goes to readelf,
+        # which can run alongside 'file' since the magic bytes told us
+        # it's ELF. Only regular files are opened: a directory can't be
+        # read and opening a FIFO would block the whole server.
+        is_elf = False
+        elf_summary = None
+        if S_ISREG(stat.st_mode):
+            try:
+                with self._open_mapped(path) as data:
+                    is_elf = self._is_elf(data)
+                    elf_summary = self._elf_header_summary(data) if is_elf else None
+            except OSError:
+                pass  # unreadable or gone; 'file' will say so
+        probes = [self._file_type(path)]
+        if is_elf and elf_summary is None:
+            probes.append(self._run(["readelf", "-h", str(path)]))
+        (rc, file_output), *readelf_result = await asyncio.gather(*probes)
+        
+        if rc == 0:
+            results.append(f"\nFile Type:\n{path}: {_decode(file_output).strip()}")
+        else:
+            results.append(f"Could not determine file type: {_decode(file_output).strip()}")
         
         # Try to get more info with readelf (for ELF binaries)
-        if "ELF" in file_output:
-            try:
-                readelf_output = subprocess.check_output(
-                    ["readelf", "-h", str(path)],
-                    stderr=subprocess.STDOUT,
-                    text=True
-                )
-                results.append(f"\nELF Header:\n{readelf_output}")
-            except (subprocess.CalledProcessError, FileNotFoundError):
+        if elf_summary is not None:
+            results.append(f"\nELF Header:\n{elf_summary}")
+        elif is_elf:
+            rc, readelf_output = readelf_result[0]
+            if rc == 0:
+                results.append(f"\nELF Header:\n{_decode(readelf_output)}")
+            else:
                 results.append("\n(readelf not available for detailed ELF analysis)")
         
         return "\n".join(results)
     
+    def _scan_strings(self, data: MappedFile, min_length: int, limit: int = 100) -> tuple[list[str], int]:
+        """
+        Find printable ASCII runs with NumPy, like the 'strings' command
+        
+        Returns the first `limit` strings and the total number found.
+        """
+        arr = np.frombuffer(data, dtype=np.uint8)
+        # Same character set as GNU strings: printable ASCII plus tab
+        mask = ((arr >= 0x20) & (arr < 0x7f)) | (arr == 0x09)
+        del arr  # drop our view of the mapping so it can be closed
+        
+        # +1 where a run starts, -1 just past where it ends
+        edges = np.diff(mask.view(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        keep = (ends - starts) >= min_length
+        starts, ends = starts[keep], ends[keep]
+        
+        lines = [data[s:e].decode("ascii") for s, e in zip(starts[:limit], ends[:limit])]
+        return lines, len(starts)
+    
+    def _scan_file(self, path: Path, min_length: int) -> tuple[list[str], int]:
+        """
+        Map a file and scan it for strings, for use in a worker thread
+        
+        Opening the mapping in the thread that reads it means a cancelled
+        tool call can't try to close it while NumPy still holds a view.
+        """
+        with self._open_mapped(path) as data:
+            return self._scan_strings(data, min_length)
+    
+    @_cached
     async def extract_strings(self, file_path: str, min_length: int = 4) -> str:
         """
         Extract readable strings from a binary
         
-        LEARNING NOTE: This uses the 'strings' command.
+        LEARNING NOTE: With NumPy installed, files under 16 MiB are
+        scanned in-process (no fork/exec, vectorised byte compares).
+        Bigger files, or no NumPy, use the 'strings' command instead.
         Useful for finding hardcoded passwords, URLs, etc.
         """
         path = Path(file_path)
@@ -220,32 +839,45 @@ class GhidraMCPServer:
         if not path.exists():
             return f"Error: File not found: {file_path}"
         
-        try:
-            # Run strings command
-            strings_output = subprocess.check_output(
-                ["strings", "-n", str(min_length), str(path)],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            
-            lines = strings_output.strip().split('\n')
+        # Only regular files are scanned in-process; 'strings' reports
+        # anything else (directories, FIFOs, devices) itself
+        stat = path.stat()
+        lines = None
+        if np is not None and S_ISREG(stat.st_mode) and stat.st_size < self._strings_inproc_threshold:
+            try:
+                lines, total = await asyncio.to_thread(self._scan_file, path, min_length)
+            except OSError:
+                pass  # unreadable or gone; let 'strings' report the error
+        if lines is None:
+            try:
+                # Stream the strings command so we can stop it early
+                async with self._stream(["strings", "-n", str(min_length), str(path)]) as proc:
+                    # One line past the limit tells us there are more
+                    lines = []
+                    async for line in _read_lines(proc.stdout):
+                        lines.append(_decode(line).rstrip("\n"))
+                        if len(lines) > 100:
+                            break
+            except FileNotFoundError:
+                return "Error: 'strings' command not found. Install binutils package."
             
-            # Limit output for readability
             if len(lines) > 100:
-                result = f"=== Strings Extracted (showing first 100 of {len(lines)}) ===\n\n"
-                result += '\n'.join(lines[:100])
-                result += f"\n\n... and {len(lines) - 100} more strings"
+                total = None  # unknown, we stopped counting
+            elif proc.returncode != 0:
+                return f"Error extracting strings: {' '.join(lines)}"
             else:
-                result = f"=== Strings Extracted ({len(lines)} total) ===\n\n"
-                result += '\n'.join(lines)
-            
-            return result
+                total = len(lines)
         
-        except subprocess.CalledProcessError as e:
-            return f"Error extracting strings: {e}"
-        except FileNotFoundError:
-            return "Error: 'strings' command not found. Install binutils package."
+        # Limit output for readability. Each branch builds the text in one
+        # go rather than growing it with +=, which copies it every time.
+        body = '\n'.join(lines[:100])
+        if total is None:
+            return f"=== Strings Extracted (showing first 100 of 100+) ===\n\n{body}\n\n... and more strings"
+        if total > 100:
+            return f"=== Strings Extracted (showing first 100 of {total}) ===\n\n{body}\n\n... and {total - 100} more strings"
+        return f"=== Strings Extracted ({total} total) ===\n\n{body}"
     
+    @_cached
     async def get_file_info(self, file_path: str) -> str:
         """Get detailed file information"""
         path = Path(file_path)
@@ -253,16 +885,12 @@ class GhidraMCPServer:
         if not path.exists():
             return f"Error: File not found: {file_path}"
         
-        try:
-            output = subprocess.check_output(
-                ["file", "-b", str(path)],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            return f"File Info: {output.strip()}"
-        except subprocess.CalledProcessError as e:
-            return f"Error: {e}"
+        rc, output = await self._file_type(path)
+        if rc != 0:
+            return f"Error: {_decode(output).strip()}"
+        return f"File Info: {_decode(output).strip()}"
     
+    @_cached
     async def check_security(self, file_path: str) -> str:
         """
         Check binary security features
@@ -279,63 +907,86 @@ class GhidraMCPServer:
         results.append(f"=== Security Features: {path.name} ===\n")
         
         # Try checksec if available
-        try:
-            checksec_output = subprocess.check_output(
-                ["checksec", "--file=" + str(path)],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            results.append(checksec_output)
+        rc, checksec_output = await self._run(["checksec", "--file=" + str(path)])
+        if rc != 127:
+            results.append(_decode(checksec_output))
             return "\n".join(results)
-        except FileNotFoundError:
-            pass  # checksec not available, try manual checks
+        # checksec not available, try manual checks
         
-        # Manual security checks for ELF
+        # Only regular files can be binaries worth parsing, and opening a
+        # FIFO ourselves would block the whole server
+        if not S_ISREG(path.stat().st_mode):
+            results.append("\nNote: Install 'checksec' or 'readelf' for detailed security analysis")
+            return "\n".join(results)
+        
+        # Manual security checks for ELF, read straight from the file
         try:
-            # Check for NX (No Execute)
-            readelf_wx = subprocess.check_output(
-                ["readelf", "-l", str(path)],
-                stderr=subprocess.STDOUT,
-                text=True
+            binary_format, features = await asyncio.to_thread(self._read_security_features, path)
+        except OSError:
+            pass  # unreadable or gone; readelf/nm below will fail the same way
+        else:
+            # The manual checks below only understand ELF
+            if binary_format != "ELF":
+                results.append(f"Manual checks only support ELF binaries (detected: {binary_format or 'unknown format'})")
+                return "\n".join(results)
+            
+            if features is not None:
+                results.append(f"NX (No Execute): {'Enabled' if features['nx'] else 'Disabled'}")
+                results.append(f"PIE: {'Enabled' if features['pie'] else 'Disabled'}")
+                results.append(f"Stack Canary: {'Enabled' if features['canary'] else 'Disabled'}")
+                return "\n".join(results)
+        
+        # Fall back to readelf/nm for files we can't open or parse
+        try:
+            # The three probes are independent, so run them all at once.
+            # For NX and the canary we only need one line each, so readelf
+            # and nm are stopped as soon as they print it.
+            (rc_wx, stack_line), (rc_h, readelf_h), (rc_nm, canary_line) = await asyncio.gather(
+                self._find_line(["readelf", "-Wl", str(path)], b"GNU_STACK"),
+                self._run(["readelf", "-h", str(path)]),
+                self._find_line(["nm", str(path)], b"__stack_chk_fail")
             )
             
-            nx_enabled = "GNU_STACK" in readelf_wx and "RW" in readelf_wx
+            # Check for NX (No Execute)
+            if rc_wx != 0:
+                raise OSError(f"readelf exited with status {rc_wx}")
+            
+            # With -W each segment is one line: type, offset, vaddr, paddr,
+            # filesz, memsz, flags (e.g. "RW" or "RWE"), align
+            nx_enabled = stack_line is not None and b"E" not in b"".join(stack_line.split()[6:-1])
             results.append(f"NX (No Execute): {'Enabled' if nx_enabled else 'Disabled'}")
             
             # Check for PIE (Position Independent Executable)
-            readelf_h = subprocess.check_output(
-                ["readelf", "-h", str(path)],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
+            if rc_h != 0:
+                raise OSError(_decode(readelf_h).strip())
             
-            pie_enabled = "DYN (Shared object file)" in readelf_h or "DYN (Position-Independent Executable file)" in readelf_h
+            pie_enabled = b"DYN (Shared object file)" in readelf_h or b"DYN (Position-Independent Executable file)" in readelf_h
             results.append(f"PIE: {'Enabled' if pie_enabled else 'Disabled'}")
             
             # Check for Stack Canary
-            symbols = subprocess.check_output(
-                ["nm", str(path)],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
+            if rc_nm != 0:
+                raise OSError(f"nm exited with status {rc_nm}")
             
-            canary_enabled = "__stack_chk_fail" in symbols
+            canary_enabled = canary_line is not None
             results.append(f"Stack Canary: {'Enabled' if canary_enabled else 'Disabled'}")
             
             return "\n".join(results)
         
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        except OSError:
             results.append(f"\nNote: Install 'checksec' or 'readelf' for detailed security analysis")
             return "\n".join(results)
     
     async def run(self):
         """Start the MCP server"""
-        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+        try:
+            async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            await self._close_file_proc()
 
 # ============ MAIN ============
 